@@ -1,40 +1,56 @@
 # main.py
 
 import os
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
-from utils.data_processor import (
-    calculate_total_revenue, region_wise_sales, top_selling_products,
-    customer_analysis, daily_sales_trend, find_peak_sales_day
-)
-from utils.api_handler import fetch_all_products, create_product_mapping, enrich_sales_data
+from utils.file_handler import read_sales_data, parse_transactions, validate, filter_transactions
+from utils.data_processor import compute_all_aggregates
+from utils.api_handler import fetch_products_with_errors, create_product_mapping, enrich_sales_data
 from utils.report_generator import generate_sales_report
 
-def main():
+def main(refresh_cache=False):
     """
     Main execution function
     Complete ETL + API + Analytics pipeline with user interaction
+    refresh_cache=True re-downloads the product catalog instead of using the disk cache
     """
     print("=" * 47)
     print("       SALES ANALYTICS SYSTEM")
     print("=" * 47)
     
+    executor = ThreadPoolExecutor(max_workers=1)
+    
     try:
         # [1/10] Read sales data
+        # Lines stream straight into the parser, so reading and parsing happen together here
         print("\n[1/10] Reading sales data...")
+        line_count = 0
+        
+        def count_lines(lines):
+            nonlocal line_count
+            for line in lines:
+                line_count += 1
+                yield line
+        
         raw_lines = read_sales_data('sales_data.txt')
-        print(f"✓ Successfully read {len(raw_lines)} raw lines")
+        
+        # The API fetch is network-bound and independent of steps 1-5, so once the
+        # sales file has opened, start it in the background and collect it at step 6
+        api_future = executor.submit(fetch_products_with_errors, refresh_cache)
+        
+        transactions = parse_transactions(count_lines(raw_lines))
+        print(f"✓ Successfully read {line_count} raw lines")
         
         # [2/10] Parse transactions
         print("\n[2/10] Parsing and cleaning data...")
-        transactions = parse_transactions(raw_lines)
         print(f"✓ Parsed {len(transactions)} transactions")
         
         # [3/10] Show filter options
         print("\n[3/10] Filter Options Available:")
-        valid_trans, invalid_count, summary = validate_and_filter(transactions, region=None)
-        regions = set(t['Region'] for t in valid_trans)
-        amounts = [t['Quantity'] * t['UnitPrice'] for t in valid_trans]
+        valid_trans = validate(transactions)
+        regions = set(t.Region for t in valid_trans)
+        amounts = [t.Amount for t in valid_trans]
         print(f"Regions: {', '.join(sorted(regions))}")
         print(f"Amount Range: ₹{min(amounts):,.0f} - ₹{max(amounts):,.0f}")
         
@@ -51,13 +67,14 @@ def main():
             min_amount = float(min_amt) if min_amt else None
             max_amount = float(max_amt) if max_amt else None
             
-            final_transactions, _, filter_summary = validate_and_filter(
+            # Rows are already validated above; only the filters run here
+            final_transactions = filter_transactions(
                 valid_trans, 
                 region=region_choice if region_choice else None,
                 min_amount=min_amount,
                 max_amount=max_amount
             )
-            print(f"✓ Filtered to {filter_summary['final_count']} records")
+            print(f"✓ Filtered to {len(final_transactions)} records")
         else:
             print("✓ No filtering applied")
         
@@ -66,21 +83,22 @@ def main():
         
         # [5/10] Data analysis
         print("\n[5/10] Analyzing sales data...")
-        total_revenue = calculate_total_revenue(final_transactions)
-        region_analysis = region_wise_sales(final_transactions)
-        top_products = top_selling_products(final_transactions, 5)
+        aggregates = compute_all_aggregates(final_transactions, n=5)
+        total_revenue = aggregates['total_revenue']
         print("✓ Analysis complete")
         
         # [6/10] API Integration
         print("\n[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
+        api_products, api_errors = api_future.result()
+        for error in api_errors:
+            print(error)
         product_mapping = create_product_mapping(api_products)
         print(f"✓ Fetched {len(api_products)} products")
         
         # [7/10] Enrich data
         print("\n[7/10] Enriching sales data...")
         enriched_transactions = enrich_sales_data(final_transactions, product_mapping)
-        matches = sum(1 for t in enriched_transactions if t.get('API_Match', False))
+        matches = sum(1 for t in enriched_transactions if t.API_Match)
         match_rate = (matches / len(enriched_transactions) * 100) if enriched_transactions else 0
         print(f"✓ Enriched {len(enriched_transactions)} transactions ({match_rate:.1f}% API match)")
         
@@ -112,7 +130,13 @@ def main():
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
         print("💡 Check file permissions and network connection")
+    finally:
+        executor.shutdown(wait=False)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help="ignore data/products_cache.json and re-fetch products from the API")
+    args = parser.parse_args()
+    main(refresh_cache=args.refresh_cache)
 
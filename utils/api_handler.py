@@ -1,24 +1,135 @@
 # utils/api_handler.py
 import requests
 import os
-import re
+import json
+import time
+import threading
 from pathlib import Path
+from typing import NamedTuple
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 
-def fetch_all_products():
+PRODUCTS_URL = "https://dummyjson.com/products"
+PAGE_SIZE = 100
+MAX_WORKERS = 8
+CACHE_FILE = 'data/products_cache.json'
+CACHE_TTL = 24 * 60 * 60  # seconds
+ROWS_PER_WRITE = 4096
+
+# In-process copy of the last successfully loaded catalog (failures are never stored)
+_products_memo = None
+
+
+def _load_cached_products(cache_file=CACHE_FILE, ttl=CACHE_TTL):
+    """
+    Loads products from the on-disk cache if it is younger than ttl seconds
+    Returns: list of product dictionaries, or None if missing/stale/unreadable
+    """
+    try:
+        if time.time() - os.path.getmtime(cache_file) > ttl:
+            return None
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        return cached['products'] if cached.get('url') == PRODUCTS_URL else None
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+
+def _save_cached_products(products, cache_file=CACHE_FILE):
+    """
+    Writes products to the on-disk cache atomically (temp file + rename)
+    Returns: None on success, else an error message
+    """
+    try:
+        path = Path(cache_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'url': PRODUCTS_URL, 'products': products}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        return f"Could not write product cache: {e}"
+    return None
+
+
+def _fetch_page(session, skip):
+    """
+    Fetches one page of products starting at offset skip
+    Returns: decoded JSON page ({'products': [...], 'total': N, ...})
+    """
+    response = session.get(PRODUCTS_URL, params={'limit': PAGE_SIZE, 'skip': skip}, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def _fetch_pages(offsets):
+    """
+    Fetches the pages at offsets concurrently, in order
+    requests.Session is not guaranteed thread-safe, so each worker thread
+    gets its own session (and connection pool), closed once all pages are in
+    Returns: list of decoded JSON pages
+    """
+    local = threading.local()
+    sessions = []
+    
+    def fetch(skip):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+            sessions.append(session)
+        return _fetch_page(session, skip)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(offsets))) as pool:
+            return list(pool.map(fetch, offsets))
+    finally:
+        for session in sessions:
+            session.close()
+
+
+def fetch_all_products(refresh_cache=False):
     """
-    Fetches all products from DummyJSON API
-    Returns: list of product dictionaries
+    Fetches all products from DummyJSON API, printing any errors
+    Returns: list of product dictionaries (empty on failure)
     """
+    products, errors = fetch_products_with_errors(refresh_cache)
+    for error in errors:
+        print(error)
+    return products
+
+
+def fetch_products_with_errors(refresh_cache=False):
+    """
+    Fetches all products from DummyJSON API without printing, so it can run
+    on a background thread and let the caller report problems at a safe point
+    First page reports the catalog total; remaining pages are fetched
+    concurrently, one session per worker thread
+    Successful results are cached in-process and on disk (CACHE_FILE, CACHE_TTL);
+    pass refresh_cache=True to bypass both caches
+    Returns: (list of product dictionaries - a fresh list on every call,
+    list of error messages)
+    """
+    global _products_memo
+    if not refresh_cache:
+        if _products_memo is not None:
+            return list(_products_memo), []
+        cached = _load_cached_products()
+        if cached is not None:
+            _products_memo = cached
+            return list(cached), []
+    
     try:
-        url = "https://dummyjson.com/products?limit=100"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        with requests.Session() as session:
+            first_page = _fetch_page(session, 0)
+        products = first_page['products']
         
-        data = response.json()
-        products = data['products']
+        offsets = range(PAGE_SIZE, first_page['total'], PAGE_SIZE)
+        if offsets:
+            for page in _fetch_pages(offsets):
+                products.extend(page['products'])
         
         # Filter to required fields only
-        return [
+        products = [
             {
                 'id': product['id'],
                 'title': product['title'],
@@ -29,70 +140,87 @@ def fetch_all_products():
             }
             for product in products
         ]
+        cache_error = _save_cached_products(products)
+        _products_memo = products
+        return list(products), [cache_error] if cache_error else []
     except requests.exceptions.RequestException as e:
-        print(f"API Error: {e}")
-        return []
+        return [], [f"API Error: {e}"]
     except Exception as e:
-        print(f"Error fetching products: {e}")
-        return []
+        return [], [f"Error fetching products: {e}"]
 
 
 def create_product_mapping(api_products):
     """
     Creates a mapping of product IDs to product info
-    Returns: dictionary mapping product IDs to info
+    API IDs are small dense ints, so the mapping is a list indexed by ID
+    Returns: list where mapping[id] is (category, brand, rating), or None for unknown IDs
     """
-    mapping = {}
+    if not api_products:
+        return []
+    
+    mapping = [None] * (max(product['id'] for product in api_products) + 1)
     for product in api_products:
-        mapping[product['id']] = {
-            'title': product['title'],
-            'category': product['category'],
-            'brand': product['brand'],
-            'rating': product['rating']
-        }
+        mapping[product['id']] = (product['category'], product['brand'], product['rating'])
     return mapping
 
 
 def extract_product_id(product_id_str):
     """
     Extract numeric ID from ProductID like P101 -> 101, P5 -> 5
+    ProductIDs are validated to start with 'P', so a slice replaces the regex
     """
-    match = re.search(r'P(\d+)', product_id_str)
-    return int(match.group(1)) if match else None
+    if product_id_str[:1] != 'P':
+        return None
+    try:
+        return int(product_id_str[1:])
+    except ValueError:
+        return None
+
+
+class EnrichedTransaction(NamedTuple):
+    """Transaction fields (same order as file_handler.Transaction) plus API product info"""
+    TransactionID: str
+    Date: str
+    ProductID: str
+    ProductName: str
+    Quantity: int
+    UnitPrice: float
+    CustomerID: str
+    Region: str
+    Amount: float
+    API_Category: str
+    API_Brand: str
+    API_Rating: float
+    API_Match: bool
 
 
 def enrich_sales_data(transactions, product_mapping):
     """
     Enriches transaction data with API product information
-    Returns: list of enriched transaction dictionaries
+    Returns: list of EnrichedTransaction named tuples
     """
     enriched_transactions = []
+    max_index = len(product_mapping)
     
     for trans in transactions:
-        enriched = trans.copy()
-        product_id_str = trans['ProductID']
+        product_id_str = trans.ProductID
         
-        # Extract numeric ID from ProductID
-        api_id = extract_product_id(product_id_str)
+        # Extract numeric ID from ProductID (inlined extract_product_id)
+        api_id = None
+        if product_id_str[:1] == 'P':
+            try:
+                api_id = int(product_id_str[1:])
+            except ValueError:
+                pass
         
-        if api_id and api_id in product_mapping:
-            api_product = product_mapping[api_id]
-            enriched.update({
-                'API_Category': api_product['category'],
-                'API_Brand': api_product['brand'],
-                'API_Rating': api_product['rating'],
-                'API_Match': True
-            })
+        api_product = product_mapping[api_id] if api_id is not None and 0 < api_id < max_index else None
+        
+        # Extend the transaction tuple positionally: one allocation per row
+        if api_product:
+            enriched_transactions.append(EnrichedTransaction(*trans, *api_product, True))
         else:
             # No match found
-            enriched.update({
-                'API_Category': None,
-                'API_Brand': None,
-                'API_Rating': None,
-                'API_Match': False
-            })
-        
-        enriched_transactions.append(enriched)
+            enriched_transactions.append(EnrichedTransaction(*trans, None, None, None, False))
     
     # Save to file
     save_enriched_data(enriched_transactions)
@@ -107,34 +235,27 @@ def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data
     # Create data directory if it doesn't exist
     Path(filename).parent.mkdir(parents=True, exist_ok=True)
     
-    # Header with new columns
+    # Header with new columns (Amount is derived, so it is not written back)
     header = [
         'TransactionID', 'Date', 'ProductID', 'ProductName', 'Quantity', 
         'UnitPrice', 'CustomerID', 'Region', 'API_Category', 
         'API_Brand', 'API_Rating', 'API_Match'
     ]
     
-    with open(filename, 'w') as f:
+    # Large write buffer; rows are formatted in batches and written with one call per batch
+    with open(filename, 'w', buffering=1 << 20) as f:
         # Write header
         f.write('|'.join(header) + '\n')
         
-        # Write data rows
-        for trans in enriched_transactions:
-            row = [
-                str(trans.get('TransactionID', '')),
-                str(trans.get('Date', '')),
-                str(trans.get('ProductID', '')),
-                str(trans.get('ProductName', '')),
-                str(trans.get('Quantity', 0)),
-                str(trans.get('UnitPrice', 0.0)),
-                str(trans.get('CustomerID', '')),
-                str(trans.get('Region', '')),
-                str(trans.get('API_Category', '')) or '',
-                str(trans.get('API_Brand', '')) or '',
-                str(trans.get('API_Rating', '')) or '',
-                str(trans.get('API_Match', False))
-            ]
-            f.write('|'.join(row) + '\n')
+        # Write data rows: positional unpacking skips per-field attribute lookups
+        rows = iter(enriched_transactions)
+        while batch := list(islice(rows, ROWS_PER_WRITE)):
+            f.write(''.join([
+                f"{tid}|{date}|{pid}|{name}|{qty}|{price}|{cid}|{region}|"
+                f"{category}|{brand}|{rating}|{match}\n"
+                for tid, date, pid, name, qty, price, cid, region, _amount,
+                    category, brand, rating, match in batch
+            ]))
     
     print(f"Enriched data saved to: {filename}")
 
@@ -155,7 +276,7 @@ if __name__ == "__main__":
         
         # Step 2: Create mapping
         product_mapping = create_product_mapping(api_products)
-        print(f"✓ Created mapping for {len(product_mapping)} product IDs")
+        print(f"✓ Created mapping for {sum(1 for p in product_mapping if p)} product IDs")
         
         # Step 3: Load and process sales data
         raw_lines = read_sales_data('sales_data.txt')
@@ -165,11 +286,11 @@ if __name__ == "__main__":
         
         # Step 4: Enrich data
         enriched = enrich_sales_data(valid_trans, product_mapping)
-        matches = sum(1 for t in enriched if t['API_Match'])
+        matches = sum(1 for t in enriched if t.API_Match)
         print(f"✓ Enriched {len(enriched)} transactions ({matches} API matches)")
         
         # Stats
-        print(f"Sample enriched transaction: {list(enriched[0].items())[:6]}")
+        print(f"Sample enriched transaction: {list(enriched[0]._asdict().items())[:6]}")
         
     except ImportError as e:
         print(f"Missing Part 1/2 files: {e}")
@@ -1,11 +1,16 @@
 # utils/data_processor.py
+from collections import defaultdict
+from heapq import nlargest
+from operator import attrgetter, itemgetter
+
+# Column extractor: reads a row's precomputed Amount in one C call
+_amount = attrgetter('Amount')
+
 
 def calculate_total_revenue(transactions):
     """Calculates total revenue from all transactions. Returns: float"""
-    total = 0.0
-    for trans in transactions:
-        total += trans['Quantity'] * trans['UnitPrice']
-    return total
+    # map keeps the per-row add inside C, no Python frame per row
+    return sum(map(_amount, transactions), 0.0)
 
 
 def region_wise_sales(transactions):
@@ -17,8 +22,8 @@ def region_wise_sales(transactions):
     total_revenue = calculate_total_revenue(transactions)
     
     for trans in transactions:
-        region = trans['Region']
-        amount = trans['Quantity'] * trans['UnitPrice']
+        region = trans.Region
+        amount = trans.Amount
         
         if region not in region_stats:
             region_stats[region] = {'total_sales': 0.0, 'transaction_count': 0}
@@ -39,21 +44,22 @@ def top_selling_products(transactions, n=5):
     product_stats = {}
     
     for trans in transactions:
-        product = trans['ProductName']
-        qty = trans['Quantity']
-        revenue = qty * trans['UnitPrice']
+        product = trans.ProductName
+        qty = trans.Quantity
+        revenue = trans.Amount
         
         if product not in product_stats:
             product_stats[product] = {'total_qty': 0, 'total_revenue': 0.0}
         product_stats[product]['total_qty'] += qty
         product_stats[product]['total_revenue'] += revenue
     
-    product_list = [
-        (name, stats['total_qty'], round(stats['total_revenue'], 2))
-        for name, stats in product_stats.items()
-    ]
-    product_list.sort(key=lambda x: x[1], reverse=True)
-    return product_list[:n]
+    # Partial selection: O(N log n) heap instead of sorting every product
+    return nlargest(
+        n,
+        ((name, stats['total_qty'], round(stats['total_revenue'], 2))
+         for name, stats in product_stats.items()),
+        key=itemgetter(1)
+    )
 
 
 def customer_analysis(transactions):
@@ -61,9 +67,9 @@ def customer_analysis(transactions):
     customer_stats = {}
     
     for trans in transactions:
-        customer = trans['CustomerID']
-        amount = trans['Quantity'] * trans['UnitPrice']
-        product = trans['ProductName']
+        customer = trans.CustomerID
+        amount = trans.Amount
+        product = trans.ProductName
         
         if customer not in customer_stats:
             customer_stats[customer] = {
@@ -79,7 +85,7 @@ def customer_analysis(transactions):
     for customer in customer_stats:
         stats = customer_stats[customer]
         stats['avg_order_value'] = round(stats['total_spent'] / stats['purchase_count'], 2)
-        stats['products_bought'] = sorted(list(stats['products_bought']))
+        stats['products_bought'] = sorted(stats['products_bought'])
     
     return dict(sorted(customer_stats.items(), key=lambda x: x[1]['total_spent'], reverse=True))
 
@@ -89,9 +95,9 @@ def daily_sales_trend(transactions):
     daily_stats = {}
     
     for trans in transactions:
-        date = trans['Date']
-        customer = trans['CustomerID']
-        amount = trans['Quantity'] * trans['UnitPrice']
+        date = trans.Date
+        customer = trans.CustomerID
+        amount = trans.Amount
         
         if date not in daily_stats:
             daily_stats[date] = {'revenue': 0.0, 'transaction_count': 0, 'unique_customers': set()}
@@ -105,9 +111,13 @@ def daily_sales_trend(transactions):
     return dict(sorted(daily_stats.items()))
 
 
-def find_peak_sales_day(transactions):
-    """Returns (date, revenue, transaction_count) for highest revenue day"""
-    daily_stats = daily_sales_trend(transactions)
+def find_peak_sales_day(transactions, daily_stats=None):
+    """
+    Returns (date, revenue, transaction_count) for highest revenue day
+    Pass an already computed daily_sales_trend() result as daily_stats to skip re-scanning
+    """
+    if daily_stats is None:
+        daily_stats = daily_sales_trend(transactions)
     peak_date = max(daily_stats.items(), key=lambda x: x[1]['revenue'])
     return (peak_date[0], round(peak_date[1]['revenue'], 2), peak_date[1]['transaction_count'])
 
@@ -117,9 +127,9 @@ def low_performing_products(transactions, threshold=10):
     product_stats = {}
     
     for trans in transactions:
-        product = trans['ProductName']
-        qty = trans['Quantity']
-        revenue = qty * trans['UnitPrice']
+        product = trans.ProductName
+        qty = trans.Quantity
+        revenue = trans.Amount
         
         if product not in product_stats:
             product_stats[product] = {'total_qty': 0, 'total_revenue': 0.0}
@@ -135,6 +145,97 @@ def low_performing_products(transactions, threshold=10):
     return low_performers
 
 
+def compute_all_aggregates(transactions, n=5, threshold=10,
+                           include_customers=False, include_daily=False):
+    """
+    Computes the pipeline aggregates in a single pass over transactions
+    Customer and daily sections are the costly ones, so they only run when
+    include_customers / include_daily are set
+    Returns dict with keys: total_revenue, region_sales, top_products,
+    low_performers, customers, daily_trend, peak_day (same shapes as the
+    individual functions; sections not requested, and peak_day when there
+    are no transactions, are None)
+    """
+    total = 0.0
+    region_stats = defaultdict(lambda: [0.0, 0])              # [total_sales, count]
+    product_stats = defaultdict(lambda: [0, 0.0])             # [total_qty, total_revenue]
+    customer_stats = defaultdict(lambda: [0.0, 0, set()])     # [total_spent, count, products]
+    daily_stats = defaultdict(lambda: [0.0, 0, set()])        # [revenue, count, customers]
+    
+    for trans in transactions:
+        qty = trans.Quantity
+        amount = trans.Amount
+        product = trans.ProductName
+        total += amount
+        
+        stats = region_stats[trans.Region]
+        stats[0] += amount
+        stats[1] += 1
+        
+        stats = product_stats[product]
+        stats[0] += qty
+        stats[1] += amount
+        
+        if include_customers:
+            stats = customer_stats[trans.CustomerID]
+            stats[0] += amount
+            stats[1] += 1
+            stats[2].add(product)
+        
+        if include_daily:
+            stats = daily_stats[trans.Date]
+            stats[0] += amount
+            stats[1] += 1
+            stats[2].add(trans.CustomerID)
+    
+    region_sales = {
+        region: {
+            'total_sales': sales,
+            'transaction_count': count,
+            'percentage': round((sales / total) * 100, 2)
+        }
+        for region, (sales, count) in region_stats.items()
+    }
+    
+    product_list = [
+        (name, qty, round(revenue, 2))
+        for name, (qty, revenue) in product_stats.items()
+    ]
+    top_products = nlargest(n, product_list, key=itemgetter(1))
+    low_performers = sorted((p for p in product_list if p[1] < threshold), key=lambda x: x[1])
+    
+    customers = None
+    if include_customers:
+        customers = {
+            customer: {
+                'total_spent': spent,
+                'purchase_count': count,
+                'products_bought': sorted(products),
+                'avg_order_value': round(spent / count, 2)
+            }
+            for customer, (spent, count, products) in customer_stats.items()
+        }
+        customers = dict(sorted(customers.items(), key=lambda x: x[1]['total_spent'], reverse=True))
+    
+    daily_trend = peak_day = None
+    if include_daily:
+        daily_trend = {
+            date: {'revenue': revenue, 'transaction_count': count, 'unique_customers': len(custs)}
+            for date, (revenue, count, custs) in sorted(daily_stats.items())
+        }
+        peak_day = find_peak_sales_day(transactions, daily_trend) if daily_trend else None
+    
+    return {
+        'total_revenue': total,
+        'region_sales': dict(sorted(region_sales.items(), key=lambda x: x[1]['total_sales'], reverse=True)),
+        'top_products': top_products,
+        'low_performers': low_performers,
+        'customers': customers,
+        'daily_trend': daily_trend,
+        'peak_day': peak_day
+    }
+
+
 if __name__ == "__main__":
     """Test all functions - only runs when file executed directly"""
     try:
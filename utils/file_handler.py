@@ -1,107 +1,217 @@
+import codecs
+import csv
+import io
+import sys
+from typing import NamedTuple
+
+ENCODINGS = ['utf-8', 'latin-1', 'cp1252']
+
+# Byte-order marks, longest first so UTF-32 LE isn't mistaken for UTF-16 LE
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+SNIFF_SIZE = 64 * 1024
+FIELD_SIZE_LIMIT = 2**31 - 1  # fits a C long on every platform
+
+
+def _latin1_fallback(error):
+    """Decodes a byte span the chosen codec rejects as latin-1 instead of failing"""
+    return error.object[error.start:error.end].decode('latin-1'), error.end
+
+
+# Only the first SNIFF_SIZE bytes are checked, so a sniffed encoding can still meet a
+# bad byte later on; decode it as latin-1, as the old whole-file fallback did
+codecs.register_error('latin1_fallback', _latin1_fallback)
+
+
 def read_sales_data(filename):
     """
     Reads sales data from file handling encoding issues
-    Returns: list of raw lines (strings)
+    Encoding is detected once from a BOM or the first 64KB, and lines are
+    streamed lazily, so memory use does not grow with file size
+    Returns: iterator of raw lines (strings), header and empty lines skipped
     Expected Output Format:
-    ['T001|2024-12-01|P101|Laptop|2|45000|C001|North', ...]
+    'T001|2024-12-01|P101|Laptop|2|45000|C001|North', ...
+    """
+    try:
+        file = open(filename, 'rb', buffering=1 << 20)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Error: File '{filename}' not found.")
+    
+    try:
+        encoding, errors = _detect_encoding(file)
+    except OSError:
+        file.close()
+        raise
+    
+    # Wrap the already-open binary handle rather than reopening the file
+    return _iter_lines(io.TextIOWrapper(file, encoding=encoding, errors=errors))
+
+
+def _detect_encoding(file):
+    """
+    Picks an encoding for a binary file without consuming it
+    Returns: (encoding, errors) - BOM encoding if present, else first of ENCODINGS
+    that decodes the first SNIFF_SIZE bytes, with the latin1_fallback handler;
+    utf-8 with errors='replace' only as last resort
     """
-    encodings = ['utf-8', 'latin-1', 'cp1252']
+    head = file.read(SNIFF_SIZE)
+    file.seek(0)
     
-    for encoding in encodings:
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding, 'latin1_fallback'
+    
+    for encoding in ENCODINGS:
         try:
-            with open(filename, 'r', encoding=encoding) as file:
-                lines = file.readlines()
-                # Skip header row and remove empty lines
-                raw_lines = [line.strip() for line in lines[1:] if line.strip()]
-                return raw_lines
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Error: File '{filename}' not found.")
+            # final=False tolerates a multi-byte character cut at the sniff boundary
+            codecs.lookup(encoding).incrementaldecoder().decode(head, final=False)
+            return encoding, 'latin1_fallback'
         except UnicodeDecodeError:
             continue
     
-    raise FileNotFoundError(f"Error: Could not read file '{filename}' with any supported encoding.")
+    return 'utf-8', 'replace'
+
+
+def _iter_lines(file):
+    """Yields stripped, non-empty lines after the header, closing the file when done"""
+    with file:
+        next(file, None)  # Skip header row
+        for line in file:
+            line = line.strip()
+            if line:
+                yield line
+
+
+class Transaction(NamedTuple):
+    """One parsed sales record; field names match the data file header"""
+    TransactionID: str
+    Date: str
+    ProductID: str
+    ProductName: str
+    Quantity: int
+    UnitPrice: float
+    CustomerID: str
+    Region: str
+    Amount: float  # Quantity * UnitPrice, precomputed once at parse time
 
 
 def parse_transactions(raw_lines):
     """
-    Parses raw lines into clean list of dictionaries
-    Returns: list of dictionaries with keys:
-    ['TransactionID', 'Date', 'ProductID', 'ProductName', 'Quantity', 'UnitPrice', 'CustomerID', 'Region']
+    Parses raw lines (any iterable, e.g. from read_sales_data) into clean list of records
+    Returns: list of Transaction named tuples with fields:
+    ['TransactionID', 'Date', 'ProductID', 'ProductName', 'Quantity', 'UnitPrice', 'CustomerID', 'Region', 'Amount']
     """
     transactions = []
+    intern = sys.intern
     
-    for line in raw_lines:
-        try:
-            fields = line.split('|')
-            
-            # Skip rows with incorrect number of fields
-            if len(fields) != 8:
+    # split('|') never capped field size; lift csv's 128KB limit for this parse only
+    old_limit = csv.field_size_limit(FIELD_SIZE_LIMIT)
+    try:
+        # csv.reader tokenizes in C; QUOTE_NONE keeps quotes literal, exactly like split('|')
+        reader = csv.reader(raw_lines, delimiter='|', quoting=csv.QUOTE_NONE)
+        while True:
+            try:
+                # The tokenizer can reject a line (NUL byte, stray '\r'); it raises from
+                # next(), so skip just that row and resume on the following line
+                fields = next(reader)
+            except StopIteration:
+                break
+            except csv.Error:
                 continue
             
-            # Handle commas within ProductName and UnitPrice
-            product_name = fields[3].replace(',', ' ').strip()
-            unit_price_str = fields[5].replace(',', '').strip()
-            
-            transaction = {
-                'TransactionID': fields[0].strip(),
-                'Date': fields[1].strip(),
-                'ProductID': fields[2].strip(),
-                'ProductName': product_name,
-                'Quantity': int(fields[4].strip()),
-                'UnitPrice': float(unit_price_str),
-                'CustomerID': fields[6].strip(),
-                'Region': fields[7].strip()
-            }
-            transactions.append(transaction)
-        except (ValueError, IndexError):
-            continue
+            try:
+                # Unpacking rejects rows with incorrect number of fields (ValueError)
+                tid, date, pid, name, qty, price, cid, region = fields
+                
+                # Handle commas within ProductName and UnitPrice
+                # Repeating categorical values are interned so all rows share one string object
+                # int()/float() ignore surrounding whitespace, so only text fields are stripped
+                quantity = int(qty)
+                unit_price = float(price.replace(',', ''))
+                
+                transactions.append(Transaction(
+                    tid.strip(),
+                    intern(date.strip()),
+                    pid.strip(),
+                    intern(name.replace(',', ' ').strip()),
+                    quantity,
+                    unit_price,
+                    cid.strip(),
+                    intern(region.strip()),
+                    quantity * unit_price
+                ))
+            except ValueError:
+                continue
+    finally:
+        csv.field_size_limit(old_limit)
     
     return transactions
 
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+def validate(transactions):
     """
-    Validates transactions and applies optional filters
-    Returns: tuple (valid_transactions, invalid_count, filter_summary)
+    Validates transactions against the data rules
+    Returns: list of valid transactions
     """
     valid_transactions = []
-    invalid_count = 0
-    transaction_amounts = []
+    valid_append = valid_transactions.append
     
-    # Validate transactions
     for trans in transactions:
-        is_valid = True
-        
-        # Validation rules
-        if trans['Quantity'] <= 0 or trans['UnitPrice'] <= 0:
-            is_valid = False
-        if not trans['TransactionID'].startswith('T'):
-            is_valid = False
-        if not trans['ProductID'].startswith('P'):
-            is_valid = False
-        if not trans['CustomerID'].startswith('C'):
-            is_valid = False
-        
-        if is_valid:
-            amount = trans['Quantity'] * trans['UnitPrice']
-            transaction_amounts.append(amount)
-            valid_transactions.append(trans)
-        else:
-            invalid_count += 1
+        # Validation rules: cheap numeric checks first, then 1-char ID prefixes
+        # (slice compare skips the startswith() method call)
+        if (trans.Quantity > 0 and trans.UnitPrice > 0
+                and trans.TransactionID[:1] == 'T'
+                and trans.ProductID[:1] == 'P'
+                and trans.CustomerID[:1] == 'C'):
+            valid_append(trans)
+    
+    return valid_transactions
+
+
+def filter_transactions(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    Applies optional region and amount filters to already validated transactions
+    Returns: new list of transactions matching every given filter
+    """
+    if region:
+        transactions = [t for t in transactions if t.Region == region]
+    
+    if min_amount or max_amount:
+        low = float('-inf') if min_amount is None else min_amount
+        high = float('inf') if max_amount is None else max_amount
+        transactions = [t for t in transactions if low <= t.Amount <= high]
+    
+    return list(transactions)
+
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    Validates transactions and applies optional filters
+    Composition of validate() and filter_transactions() that also reports progress
+    Returns: tuple (valid_transactions, invalid_count, filter_summary)
+    """
+    valid_transactions = validate(transactions)
+    invalid_count = len(transactions) - len(valid_transactions)
     
     # Print available regions
-    regions = set(t['Region'] for t in valid_transactions)
+    regions = set(t.Region for t in valid_transactions)
     print(f"Available regions: {sorted(regions)}")
     
     # Print amount range
-    if transaction_amounts:
+    if valid_transactions:
+        transaction_amounts = [t.Amount for t in valid_transactions]
         print(f"Transaction amount range: {min(transaction_amounts):.2f} - {max(transaction_amounts):.2f}")
     
     # Apply region filter
     filtered_by_region = 0
     if region:
         original_count = len(valid_transactions)
-        valid_transactions = [t for t in valid_transactions if t['Region'] == region]
+        valid_transactions = filter_transactions(valid_transactions, region=region)
         filtered_by_region = original_count - len(valid_transactions)
         print(f"Records after region filter ({region}): {len(valid_transactions)}")
     
@@ -109,11 +219,9 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     filtered_by_amount = 0
     if min_amount or max_amount:
         original_count = len(valid_transactions)
-        valid_transactions = [
-            t for t in valid_transactions
-            if (min_amount is None or t['Quantity'] * t['UnitPrice'] >= min_amount) and
-               (max_amount is None or t['Quantity'] * t['UnitPrice'] <= max_amount)
-        ]
+        valid_transactions = filter_transactions(
+            valid_transactions, min_amount=min_amount, max_amount=max_amount
+        )
         filtered_by_amount = original_count - len(valid_transactions)
         print(f"Records after amount filter: {len(valid_transactions)}")
     
@@ -132,7 +240,7 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
 # Test code (runs only when file executed directly)
 if __name__ == "__main__":
     print("Testing Part 1 functions...")
-    raw_lines = read_sales_data('sales_data.txt')
+    raw_lines = list(read_sales_data('sales_data.txt'))
     print(f"✓ Read {len(raw_lines)} raw lines")
     
     transactions = parse_transactions(raw_lines)
@@ -1,11 +1,161 @@
 # utils/report_generator.py - COMPLETE Part 4
 
+from collections import defaultdict
 from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter
+import heapq
 import os
 
-def _format_currency(amount):
-    """Format currency with Indian comma style"""
-    return f"₹{amount:,.2f}"
+# Reads the fields the report aggregates in one C call; works for any row type with
+# these attributes (Transaction, EnrichedTransaction, ...)
+_row_fields = attrgetter('Date', 'ProductName', 'Quantity', 'CustomerID', 'Region', 'Amount')
+
+# Fixed report lines, built once at import instead of on every report
+_SEP_EQ = "=" * 47 + "\n"
+_SEP_DASH = "-" * 44 + "\n"
+_REGION_HDR = f"{'Region':<10}{'Sales':>15}{'% of Total':>13}{'Transactions':>15}\n"
+_PRODUCT_HDR = f"{'Rank':<6}{'Product Name':<25}{'Quantity Sold':>15}{'Revenue':>15}\n"
+_CUSTOMER_HDR = f"{'Rank':<6}{'Customer ID':<15}{'Total Spent':>15}{'Order Count':>15}\n"
+_DAILY_HDR = f"{'Date':<12}{'Revenue':>15}{'Transactions':>15}{'Unique Customers':>20}\n"
+
+# Precompiled row formats; bound str.format skips a Python frame per cell
+_REGION_ROW = "{:<10}{:>15}{:>10.1f}%{:>15}\n".format
+_PRODUCT_ROW = "{:<6}{:<25.24}{:>15}{:>15}\n".format
+_CUSTOMER_ROW = "{:<6}{:<15}{:>15}{:>15}\n".format
+_DAILY_ROW = "{:<12}{:>15}{:>15}{:>20}\n".format
+_LOW_ROW = "  {:<25.25} {:>5} units  {}\n".format
+_AVG_ROW = "  {:<12}{}\n".format
+
+# Format currency with Indian comma style; repeated totals hit the cache
+_format_currency = lru_cache(maxsize=4096)("₹{:,.2f}".format)
+
+def _render_header(generated_at, total_records):
+    """Yields the report title block"""
+    yield _SEP_EQ
+    yield "          SALES ANALYTICS REPORT\n"
+    yield f"        Generated: {generated_at}\n"
+    yield f"        Records Processed: {total_records}\n"
+    yield _SEP_EQ + "\n"
+
+def _render_enrichment(enriched_transactions):
+    """Yields the API enrichment summary section"""
+    total_enriched = len(enriched_transactions)
+    matches = 0
+    unmatched_set = set()
+    for t in enriched_transactions:
+        if t.API_Match:
+            matches += 1
+        else:
+            unmatched_set.add(t.ProductID)
+    success_rate = (matches / total_enriched * 100) if total_enriched else 0
+    unmatched = sorted(unmatched_set)
+    
+    yield "API ENRICHMENT SUMMARY\n"
+    yield _SEP_DASH
+    yield f"Total Products Enriched:  {total_enriched}\n"
+    yield f"Success Rate:             {success_rate:.1f}%\n"
+    yield "Products that couldn't be enriched:\n"
+    if unmatched:
+        for pid in unmatched[:15]:
+            yield f"  - {pid}\n"
+        if len(unmatched) > 15:
+            yield f"  ... and {len(unmatched)-15} more\n"
+    else:
+        yield "  - None\n"
+
+def _render_report(generated_at, total_records, total_revenue, total_transactions,
+                   avg_order_value, date_range, region_stats, top_products, top_customers,
+                   daily_rows, peak_day, low_products, enriched_transactions):
+    """Yields the formatted report one line at a time"""
+    # ===== 1. HEADER =====
+    yield from _render_header(generated_at, total_records)
+    
+    # ===== 2. OVERALL SUMMARY =====
+    yield "OVERALL SUMMARY\n"
+    yield _SEP_DASH
+    yield f"Total Revenue:        {_format_currency(total_revenue)}\n"
+    yield f"Total Transactions:   {total_transactions}\n"
+    yield f"Average Order Value:  {_format_currency(avg_order_value)}\n"
+    yield f"Date Range:           {date_range}\n\n"
+    
+    # ===== 3. REGION-WISE PERFORMANCE =====
+    yield "REGION-WISE PERFORMANCE\n"
+    yield _SEP_DASH
+    yield _REGION_HDR
+    yield _SEP_DASH
+    for region, stats in sorted(region_stats.items(), key=lambda x: x[1]['total_sales'], reverse=True):
+        yield _REGION_ROW(region, _format_currency(stats['total_sales']),
+                          stats['percentage'], stats['transaction_count'])
+    yield "\n"
+    
+    # ===== 4. TOP 5 PRODUCTS =====
+    yield "TOP 5 PRODUCTS\n"
+    yield _SEP_DASH
+    yield _PRODUCT_HDR
+    yield _SEP_DASH
+    for i, (name, stats) in enumerate(top_products, 1):
+        yield _PRODUCT_ROW(i, name, stats['qty'], _format_currency(stats['revenue']))
+    yield "\n"
+    
+    # ===== 5. TOP 5 CUSTOMERS =====
+    yield "TOP 5 CUSTOMERS\n"
+    yield _SEP_DASH
+    yield _CUSTOMER_HDR
+    yield _SEP_DASH
+    for i, (cust_id, stats) in enumerate(top_customers, 1):
+        yield _CUSTOMER_ROW(i, cust_id, _format_currency(stats['spent']), stats['count'])
+    yield "\n"
+    
+    # ===== 6. DAILY SALES TREND =====
+    yield "DAILY SALES TREND\n"
+    yield _SEP_DASH
+    yield _DAILY_HDR
+    yield _SEP_DASH
+    for date, stats in daily_rows[:12]:  # Show first 12 days
+        yield _DAILY_ROW(date, _format_currency(stats['revenue']),
+                         stats['count'], stats['unique_customers'])
+    if len(daily_rows) > 12:
+        yield f"... and {len(daily_rows)-12} more days\n"
+    yield "\n"
+    
+    # ===== 7. PRODUCT PERFORMANCE ANALYSIS =====
+    yield "PRODUCT PERFORMANCE ANALYSIS\n"
+    yield _SEP_DASH
+    peak_date, peak_stats = peak_day
+    yield f"Best Selling Day: {peak_date}\n"
+    yield (f"Revenue: {_format_currency(peak_stats['revenue'])} | "
+           f"Transactions: {peak_stats['count']}\n\n")
+    
+    yield "Low Performing Products (Quantity < 10):\n"
+    if low_products:
+        for name, qty, rev in low_products:
+            yield _LOW_ROW(name, qty, _format_currency(rev))
+    else:
+        yield "  None\n\n"
+    
+    yield "Average Transaction Value per Region:\n"
+    for region, stats in sorted(region_stats.items(),
+                                key=lambda x: x[1]['total_sales'] / x[1]['transaction_count'],
+                                reverse=True):
+        avg_val = stats['total_sales'] / stats['transaction_count']
+        yield _AVG_ROW(region, _format_currency(avg_val))
+    yield "\n"
+    
+    # ===== 8. API ENRICHMENT SUMMARY =====
+    yield from _render_enrichment(enriched_transactions)
+
+def _write_empty_report(output_file, enriched_transactions):
+    """Writes a short report when there are no transactions to analyse"""
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    with open(output_file, 'w', encoding='utf-8', newline='\n') as f:
+        f.writelines(_render_header(generated_at, 0))
+        f.write("No transactions to report.\n\n")
+        f.writelines(_render_enrichment(enriched_transactions or []))
+    
+    print(f"✅ Sales report generated: {output_file}")
 
 def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
     """
@@ -24,200 +174,106 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
     
     # Safety checks
     if not transactions:
-        transactions = []
+        # Nothing to aggregate; skip the section work entirely
+        _write_empty_report(output_file, enriched_transactions)
+        return
     
     # 1. HEADER
     generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     total_records = len(transactions)
     
+    # 2-6. Aggregate every section in a single pass over transactions
+    # List accumulators: one hash lookup per group per row, mutated in place
+    total_revenue = 0
+    region_acc = defaultdict(lambda: [0, 0])           # [total_sales, transaction_count]
+    product_acc = defaultdict(lambda: [0, 0])          # [qty, revenue]
+    customer_acc = defaultdict(lambda: [0, 0])         # [spent, count]
+    daily_acc = defaultdict(lambda: [0, 0, set()])     # [revenue, count, customers]
+    
+    for t in transactions:
+        date, product, qty, customer, region, amount = _row_fields(t)
+        total_revenue += amount
+        
+        acc = region_acc[region]
+        acc[0] += amount
+        acc[1] += 1
+        
+        acc = product_acc[product]
+        acc[0] += qty
+        acc[1] += amount
+        
+        acc = customer_acc[customer]
+        acc[0] += amount
+        acc[1] += 1
+        
+        acc = daily_acc[date]
+        acc[0] += amount
+        acc[1] += 1
+        acc[2].add(customer)
+    
+    # Back to the named shape used by the sections below
+    region_stats = {r: {'total_sales': s, 'transaction_count': c} for r, (s, c) in region_acc.items()}
+    product_stats = {p: {'qty': q, 'revenue': r} for p, (q, r) in product_acc.items()}
+    customer_stats = {c: {'spent': s, 'count': n} for c, (s, n) in customer_acc.items()}
+    daily_stats = {d: {'revenue': r, 'count': n, 'unique_customers': len(cs)} for d, (r, n, cs) in daily_acc.items()}
+    
     # 2. OVERALL SUMMARY
-    total_revenue = sum(t['Quantity'] * t['UnitPrice'] for t in transactions)
     total_transactions = len(transactions)
-    avg_order_value = total_revenue / total_transactions if total_transactions else 0
-    dates = sorted({t['Date'] for t in transactions})
-    date_range = f"{dates[0]} to {dates[-1]}" if dates else "N/A"
+    avg_order_value = total_revenue / total_transactions
+    # ISO dates sort lexicographically; the sorted days also feed the daily trend
+    daily_rows = sorted(daily_stats.items())
+    date_range = f"{daily_rows[0][0]} to {daily_rows[-1][0]}"
     
     # 3. REGION-WISE PERFORMANCE
-    region_stats = {}
-    for t in transactions:
-        region = t['Region']
-        amount = t['Quantity'] * t['UnitPrice']
-        if region not in region_stats:
-            region_stats[region] = {'total_sales': 0, 'transaction_count': 0}
-        region_stats[region]['total_sales'] += amount
-        region_stats[region]['transaction_count'] += 1
-    
-    # Add percentages & sort
+    # Add percentages; display order is applied when the section is written
     for region in region_stats:
         region_stats[region]['percentage'] = (
             region_stats[region]['total_sales'] / total_revenue * 100
         )
-    region_stats = dict(sorted(region_stats.items(), key=lambda x: x[1]['total_sales'], reverse=True))
     
     # 4. TOP 5 PRODUCTS
-    product_stats = {}
-    for t in transactions:
-        product = t['ProductName']
-        qty = t['Quantity']
-        revenue = qty * t['UnitPrice']
-        if product not in product_stats:
-            product_stats[product] = {'qty': 0, 'revenue': 0}
-        product_stats[product]['qty'] += qty
-        product_stats[product]['revenue'] += revenue
-    
-    top_products = sorted(product_stats.items(), key=lambda x: x[1]['qty'], reverse=True)[:5]
+    top_products = heapq.nlargest(5, product_stats.items(), key=lambda x: x[1]['qty'])
     
     # 5. TOP 5 CUSTOMERS
-    customer_stats = {}
-    for t in transactions:
-        customer = t['CustomerID']
-        amount = t['Quantity'] * t['UnitPrice']
-        if customer not in customer_stats:
-            customer_stats[customer] = {'spent': 0, 'count': 0}
-        customer_stats[customer]['spent'] += amount
-        customer_stats[customer]['count'] += 1
-    
-    top_customers = sorted(customer_stats.items(), key=lambda x: x[1]['spent'], reverse=True)[:5]
-    
-    # 6. DAILY SALES TREND
-    daily_stats = {}
-    for t in transactions:
-        date = t['Date']
-        customer = t['CustomerID']
-        amount = t['Quantity'] * t['UnitPrice']
-        if date not in daily_stats:
-            daily_stats[date] = {'revenue': 0, 'count': 0, 'customers': set()}
-        daily_stats[date]['revenue'] += amount
-        daily_stats[date]['count'] += 1
-        daily_stats[date]['customers'].add(customer)
-    
-    for date in daily_stats:
-        daily_stats[date]['unique_customers'] = len(daily_stats[date]['customers'])
-    daily_stats = dict(sorted(daily_stats.items()))
+    top_customers = heapq.nlargest(5, customer_stats.items(), key=lambda x: x[1]['spent'])
     
     # 7. PRODUCT PERFORMANCE
-    peak_day = max(daily_stats.items(), key=lambda x: x[1]['revenue']) if daily_stats else ("N/A", {})
-    low_products = [(name, stats['qty'], stats['revenue']) for name, stats in product_stats.items() 
-                   if stats['qty'] < 10]
-    low_products.sort(key=lambda x: x[1])
-    
-    region_avg = {r: stats['total_sales']/stats['transaction_count'] 
-                 for r, stats in region_stats.items()}
-    
-    # 8. API ENRICHMENT SUMMARY
-    total_enriched = len(enriched_transactions)
-    matches = sum(1 for t in enriched_transactions if t.get('API_Match', False))
-    success_rate = (matches / total_enriched * 100) if total_enriched else 0
-    unmatched = sorted({t['ProductID'] for t in enriched_transactions if not t.get('API_Match', False)})
+    peak_day = max(daily_rows, key=lambda x: x[1]['revenue'])
+    low_products = heapq.nsmallest(
+        8,
+        ((name, stats['qty'], stats['revenue']) for name, stats in product_stats.items()
+         if stats['qty'] < 10),
+        key=lambda x: x[1],
+    )
     
     # CREATE OUTPUT DIRECTORY & FILE
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # ===== 1. HEADER =====
-        f.write("=" * 47 + "\n")
-        f.write("          SALES ANALYTICS REPORT\n")
-        f.write(f"        Generated: {generated_at}\n")
-        f.write(f"        Records Processed: {total_records}\n")
-        f.write("=" * 47 + "\n\n")
-        
-        # ===== 2. OVERALL SUMMARY =====
-        f.write("OVERALL SUMMARY\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"Total Revenue:        {_format_currency(total_revenue)}\n")
-        f.write(f"Total Transactions:   {total_transactions}\n")
-        f.write(f"Average Order Value:  {_format_currency(avg_order_value)}\n")
-        f.write(f"Date Range:           {date_range}\n\n")
-        
-        # ===== 3. REGION-WISE PERFORMANCE =====
-        f.write("REGION-WISE PERFORMANCE\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"{'Region':<10}{'Sales':>15}{'% of Total':>13}{'Transactions':>15}\n")
-        f.write("-" * 44 + "\n")
-        for region, stats in region_stats.items():
-            f.write(f"{region:<10}{_format_currency(stats['total_sales']):>15}"
-                   f"{stats['percentage']:>10.1f}%{stats['transaction_count']:>15}\n")
-        f.write("\n")
-        
-        # ===== 4. TOP 5 PRODUCTS =====
-        f.write("TOP 5 PRODUCTS\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"{'Rank':<6}{'Product Name':<25}{'Quantity Sold':>15}{'Revenue':>15}\n")
-        f.write("-" * 44 + "\n")
-        for i, (name, stats) in enumerate(top_products, 1):
-            f.write(f"{i:<6}{name[:24]:<25}{stats['qty']:>15}{_format_currency(stats['revenue']):>15}\n")
-        f.write("\n")
-        
-        # ===== 5. TOP 5 CUSTOMERS =====
-        f.write("TOP 5 CUSTOMERS\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"{'Rank':<6}{'Customer ID':<15}{'Total Spent':>15}{'Order Count':>15}\n")
-        f.write("-" * 44 + "\n")
-        for i, (cust_id, stats) in enumerate(top_customers, 1):
-            f.write(f"{i:<6}{cust_id:<15}{_format_currency(stats['spent']):>15}{stats['count']:>15}\n")
-        f.write("\n")
-        
-        # ===== 6. DAILY SALES TREND =====
-        f.write("DAILY SALES TREND\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"{'Date':<12}{'Revenue':>15}{'Transactions':>15}{'Unique Customers':>20}\n")
-        f.write("-" * 44 + "\n")
-        for date, stats in list(daily_stats.items())[:12]:  # Show first 12 days
-            f.write(f"{date:<12}{_format_currency(stats['revenue']):>15}"
-                   f"{stats['count']:>15}{stats['unique_customers']:>20}\n")
-        if len(daily_stats) > 12:
-            f.write(f"... and {len(daily_stats)-12} more days\n")
-        f.write("\n")
-        
-        # ===== 7. PRODUCT PERFORMANCE ANALYSIS =====
-        f.write("PRODUCT PERFORMANCE ANALYSIS\n")
-        f.write("-" * 44 + "\n")
-        peak_date, peak_stats = peak_day
-        f.write(f"Best Selling Day: {peak_date}\n")
-        f.write(f"Revenue: {_format_currency(peak_stats['revenue'])} | "
-               f"Transactions: {peak_stats['count']}\n\n")
-        
-        f.write("Low Performing Products (Quantity < 10):\n")
-        if low_products:
-            for name, qty, rev in low_products[:8]:
-                f.write(f"  {name[:25]:<25} {qty:>5} units  {_format_currency(rev)}\n")
-        else:
-            f.write("  None\n\n")
-        
-        f.write("Average Transaction Value per Region:\n")
-        for region, avg_val in sorted(region_avg.items(), key=lambda x: x[1], reverse=True):
-            f.write(f"  {region:<12}{_format_currency(avg_val)}\n")
-        f.write("\n")
-        
-        # ===== 8. API ENRICHMENT SUMMARY =====
-        f.write("API ENRICHMENT SUMMARY\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"Total Products Enriched:  {total_enriched}\n")
-        f.write(f"Success Rate:             {success_rate:.1f}%\n")
-        f.write("Products that couldn't be enriched:\n")
-        if unmatched:
-            for pid in unmatched[:15]:
-                f.write(f"  - {pid}\n")
-            if len(unmatched) > 15:
-                f.write(f"  ... and {len(unmatched)-15} more\n")
-        else:
-            f.write("  - None\n")
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 20, newline='\n') as f:
+        # Lines stream straight into the 1MB file buffer; no full copy held in memory
+        f.writelines(_render_report(
+            generated_at, total_records, total_revenue, total_transactions,
+            avg_order_value, date_range, region_stats, top_products, top_customers,
+            daily_rows, peak_day, low_products, enriched_transactions,
+        ))
     
     print(f"✅ Sales report generated: {output_file}")
 
 # Test function (runs only when file executed directly)
 if __name__ == "__main__":
+    from file_handler import Transaction
+    from api_handler import EnrichedTransaction
+    
     print("Testing report generation...")
     # This would normally import from other parts
     # For standalone testing, create dummy data
     dummy_transactions = [
-        {'TransactionID': 'T001', 'Date': '2024-12-01', 'ProductID': 'P101', 
-         'ProductName': 'Laptop', 'Quantity': 2, 'UnitPrice': 45000, 
-         'CustomerID': 'C001', 'Region': 'North'}
+        Transaction(TransactionID='T001', Date='2024-12-01', ProductID='P101',
+                    ProductName='Laptop', Quantity=2, UnitPrice=45000,
+                    CustomerID='C001', Region='North', Amount=90000)
     ]
     dummy_enriched = [
-        {'TransactionID': 'T001', 'Date': '2024-12-01', 'ProductID': 'P101', 
-         'ProductName': 'Laptop', 'Quantity': 2, 'UnitPrice': 45000, 
-         'CustomerID': 'C001', 'Region': 'North', 'API_Match': True}
+        EnrichedTransaction(*dummy_transactions[0], API_Category='laptops',
+                            API_Brand='Apple', API_Rating=4.5, API_Match=True)
     ]
     generate_sales_report(dummy_transactions, dummy_enriched)
\ No newline at end of file